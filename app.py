@@ -2,7 +2,7 @@
 # Part 1: Imports, Configuration, Database Initialization, and Utility Helpers
 
 from flask import Flask, render_template_string, request, redirect, url_for, session, send_from_directory, abort
-import sqlite3, os, hashlib, datetime
+import sqlite3, os, hashlib, datetime, time, shutil, click
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
@@ -11,9 +11,37 @@ UPLOAD_FOLDER = "static/uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+DB_PATH = "wheelsup.db"
+ARCHIVE_FOLDER = "archive"
+# table: (partition index columns, hot tally table, tally key columns). Likes and
+# trip comments stay hot: likes carry toggle state and the trip board reads them all.
+ARCHIVE_TABLES = {
+    "messages": ("sender_id, receiver_id, created_at", "archived_messages", "sender_id, receiver_id"),
+    "comments": ("post_id, created_at", "archived_comments", "post_id"),
+}
+ARCHIVE_AFTER_DAYS = int(os.environ.get("WHEELSUP_ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = 500      # rows moved per write transaction
+ARCHIVE_PAUSE = 0.05          # seconds between batches so live writers get the lock
+ARCHIVE_VACUUM_PAGES = 256    # pages released per incremental vacuum step
+PAGE_SIZE = 50
+BACKUP_FOLDER = "backups"
+BACKUP_KEEP = int(os.environ.get("WHEELSUP_BACKUP_KEEP", "7"))
+BACKUP_STEP_PAGES = 256       # pages copied per backup step
+BACKUP_PAUSE = 0.01           # seconds between steps; the source lock is released meanwhile
+REPLICA_PATH = "wheelsup-replica.db"
+REPLICA_MAX_AGE = int(os.environ.get("WHEELSUP_REPLICA_MAX_AGE", "300"))
+DB_THREADS = int(os.environ.get("WHEELSUP_DB_THREADS", "8"))
+DB_BUSY_TIMEOUT = float(os.environ.get("WHEELSUP_DB_BUSY_TIMEOUT", "1"))  # seconds; writes are single short jobs
+
 def init_db():
-    with sqlite3.connect("wheelsup.db") as con:
+    with sqlite3.connect(DB_PATH) as con:
         cur = con.cursor()
+        # Incremental auto-vacuum lets the archiver hand freed pages back to the OS a few
+        # at a time. It is free on a new file; existing ones by `flask archive --convert`.
+        if not cur.execute("SELECT 1 FROM sqlite_master").fetchone():
+            cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL lets backups and replica refreshes read a snapshot while routes keep writing.
+        cur.execute("PRAGMA journal_mode=WAL")
         cur.execute('''CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY,
             email TEXT UNIQUE,
@@ -77,14 +105,76 @@ def init_db():
             message TEXT,
             created_at TEXT
         )''')
+        cur.execute('''CREATE TABLE IF NOT EXISTS archived_messages (
+            sender_id INTEGER,
+            receiver_id INTEGER,
+            total INTEGER,
+            PRIMARY KEY(sender_id, receiver_id)
+        )''')
+        cur.execute('''CREATE TABLE IF NOT EXISTS archived_comments (
+            post_id INTEGER PRIMARY KEY,
+            total INTEGER
+        )''')
+        for table in ARCHIVE_TABLES:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table}(created_at)")
 init_db()
 
 def hash_pass(p): return hashlib.sha256(p.encode()).hexdigest()
 
+# Under the gevent worker every sqlite3 call would block the event loop, so
+# gunicorn.conf.py gives each worker its own pool of DB_THREADS threads (db_pool).
+# Reads through connect() run each statement and fetch there; writes go through
+# db_write/db_toggle, which run statements plus commit as one job on their own
+# connection, so a connection holding the write lock never queues for a thread.
+# Under sync/gthread workers db_pool stays None and everything runs inline.
+db_pool = None
+
+def db_offload(fn, *args):
+    if db_pool is None:
+        return fn(*args)
+    return db_pool.apply(fn, args)
+
+class PooledCursor(sqlite3.Cursor):
+    def execute(self, *args): return db_offload(super().execute, *args)
+    def executemany(self, *args): return db_offload(super().executemany, *args)
+    def fetchone(self): return db_offload(super().fetchone)
+    def fetchmany(self, *args): return db_offload(super().fetchmany, *args)
+    def fetchall(self): return db_offload(super().fetchall)
+    def __iter__(self): return iter(self.fetchall())
+
+class PooledConnection(sqlite3.Connection):
+    def cursor(self, factory=PooledCursor): return super().cursor(factory)
+    def execute(self, *args): return self.cursor().execute(*args)
+
+def connect(path=DB_PATH, **kwargs):
+    return sqlite3.connect(path, factory=PooledConnection, check_same_thread=False,
+                           timeout=DB_BUSY_TIMEOUT, **kwargs)
+
+def db_job(work, *args):
+    def job():
+        con = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT)
+        try:
+            with con:
+                return work(con, *args)
+        finally:
+            con.close()
+    return db_offload(job)
+
+def db_write(sql, params=()):
+    return db_job(lambda con: con.execute(sql, params).rowcount)
+
+def db_toggle(insert_sql, delete_sql, params):
+    def work(con):
+        try:
+            con.execute(insert_sql, params)
+        except sqlite3.IntegrityError:
+            con.execute(delete_sql, params)
+    return db_job(work)
+
 def get_user():
     uid = session.get('user_id')
     if not uid: return None
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("SELECT * FROM users WHERE id=?", (uid,))
     return cur.fetchone()
@@ -98,10 +188,8 @@ def register():
         email = request.form["email"]
         password = hash_pass(request.form["password"])
         name = request.form["name"]
-        con = sqlite3.connect("wheelsup.db")
         try:
-            con.execute("INSERT INTO users (email, password, name) VALUES (?, ?, ?)", (email, password, name))
-            con.commit()
+            db_write("INSERT INTO users (email, password, name) VALUES (?, ?, ?)", (email, password, name))
             return redirect("/login")
         except:
             return "Email already registered"
@@ -112,7 +200,7 @@ def login():
     if request.method == "POST":
         email = request.form["email"]
         password = hash_pass(request.form["password"])
-        con = sqlite3.connect("wheelsup.db")
+        con = connect()
         cur = con.cursor()
         cur.execute("SELECT id FROM users WHERE email=? AND password=?", (email, password))
         row = cur.fetchone()
@@ -132,17 +220,21 @@ def inject_counters():
     user = get_user()
     if not user:
         return dict(notif_count=0, message_count=0)
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("SELECT COUNT(*) FROM likes WHERE post_id IN (SELECT id FROM posts WHERE user_id=?)", (user[0],))
     like_count = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM comments WHERE post_id IN (SELECT id FROM posts WHERE user_id=?)", (user[0],))
+    cur.execute("""SELECT (SELECT COUNT(*) FROM comments WHERE post_id IN (SELECT id FROM posts WHERE user_id=?))
+                        + (SELECT COALESCE(SUM(total), 0) FROM archived_comments
+                           WHERE post_id IN (SELECT id FROM posts WHERE user_id=?))""", (user[0], user[0]))
     comment_count = cur.fetchone()[0]
     cur.execute("SELECT COUNT(*) FROM follows WHERE followee_id=?", (user[0],))
     follow_count = cur.fetchone()[0]
     notif_total = like_count + comment_count + follow_count
 
-    cur.execute("SELECT COUNT(*) FROM messages WHERE receiver_id=?", (user[0],))
+    cur.execute("""SELECT (SELECT COUNT(*) FROM messages WHERE receiver_id=?)
+                        + (SELECT COALESCE(SUM(total), 0) FROM archived_messages WHERE receiver_id=?)""",
+                (user[0], user[0]))
     message_total = cur.fetchone()[0]
 
     return dict(notif_count=notif_total, message_count=message_total)
@@ -163,12 +255,10 @@ def index():
             filename = secure_filename(file.filename)
             image_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
             file.save(image_path)
-        con = sqlite3.connect("wheelsup.db")
-        con.execute("INSERT INTO posts (user_id, content, image, created_at) VALUES (?, ?, ?, ?)",
-                    (user[0], content, image_path, str(datetime.datetime.now())))
-        con.commit()
+        db_write("INSERT INTO posts (user_id, content, image, created_at) VALUES (?, ?, ?, ?)",
+                 (user[0], content, image_path, str(datetime.datetime.now())))
 
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("""SELECT posts.id, users.name, posts.content, posts.image, posts.created_at, users.id
                    FROM posts JOIN users ON posts.user_id = users.id
@@ -181,18 +271,15 @@ def index():
                               FROM comments JOIN users ON comments.user_id = users.id
                               ORDER BY created_at"""):
         comments.setdefault(row[0], []).append(row[1:])
-    return render_template_string(FEED_TEMPLATE, user=user, posts=posts, likes=likes, comments=comments)
+    archived = {row[0]: row[1] for row in con.execute("SELECT post_id, total FROM archived_comments")}
+    return render_template_string(FEED_TEMPLATE, user=user, posts=posts, likes=likes, comments=comments, archived=archived)
 
 @app.route("/like/<int:post_id>")
 def like(post_id):
     user = get_user()
     if user:
-        con = sqlite3.connect("wheelsup.db")
-        try:
-            con.execute("INSERT INTO likes (user_id, post_id) VALUES (?, ?)", (user[0], post_id))
-        except:
-            con.execute("DELETE FROM likes WHERE user_id=? AND post_id=?", (user[0], post_id))
-        con.commit()
+        db_toggle("INSERT INTO likes (user_id, post_id) VALUES (?, ?)",
+                  "DELETE FROM likes WHERE user_id=? AND post_id=?", (user[0], post_id))
     return redirect("/")
 
 @app.route("/comment/<int:post_id>", methods=["POST"])
@@ -200,10 +287,8 @@ def comment(post_id):
     user = get_user()
     if user:
         content = request.form["comment"]
-        con = sqlite3.connect("wheelsup.db")
-        con.execute("INSERT INTO comments (post_id, user_id, content, created_at) VALUES (?, ?, ?, ?)",
-                    (post_id, user[0], content, str(datetime.datetime.now())))
-        con.commit()
+        db_write("INSERT INTO comments (post_id, user_id, content, created_at) VALUES (?, ?, ?, ?)",
+                 (post_id, user[0], content, str(datetime.datetime.now())))
     return redirect("/")
 
 @app.route("/post/<int:post_id>")
@@ -211,23 +296,26 @@ def view_post(post_id):
     user = get_user()
     if not user:
         return redirect("/login")
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("SELECT posts.id, users.name, posts.content, posts.image, posts.created_at, users.id FROM posts JOIN users ON posts.user_id = users.id WHERE posts.id=?", (post_id,))
     post = cur.fetchone()
     if not post:
         return abort(404)
     likes = {post[0]: cur.execute("SELECT COUNT(*) FROM likes WHERE post_id=?", (post_id,)).fetchone()[0]}
-    cur.execute("SELECT users.name, content, created_at FROM comments JOIN users ON comments.user_id = users.id WHERE post_id=? ORDER BY created_at", (post_id,))
-    comments = {post_id: cur.fetchall()}
-    return render_template_string(FEED_TEMPLATE, user=user, posts=[post], likes=likes, comments=comments)
+    archived = cur.execute("SELECT 1 FROM archived_comments WHERE post_id=?", (post_id,)).fetchone()
+    rows, older = load_page("comments", """SELECT users.name, t.content, t.created_at
+                                           FROM {src} AS t JOIN main.users ON t.user_id = users.id
+                                           WHERE t.post_id=?""", (post_id,), request.args.get("before"), archived)
+    comments = {post_id: rows[::-1]}
+    return render_template_string(FEED_TEMPLATE, user=user, posts=[post], likes=likes, comments=comments, older=older)
 
 # WheelSup - Ultra Build v3.0
 # Part 4: Profile View, Edit, Explore, Follow System
 
 @app.route("/profile/<int:user_id>")
 def profile(user_id):
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("SELECT name, bio, avatar, cover, location, vehicle, skills FROM users WHERE id=?", (user_id,))
     user_data = cur.fetchone()
@@ -268,13 +356,11 @@ def edit_profile():
             cover_path = os.path.join(app.config["UPLOAD_FOLDER"], cover_filename)
             cover.save(cover_path)
 
-        con = sqlite3.connect("wheelsup.db")
-        con.execute("""UPDATE users SET bio=?, location=?, vehicle=?, skills=?,
-                        avatar=COALESCE(NULLIF(?, ''), avatar),
-                        cover=COALESCE(NULLIF(?, ''), cover)
-                     WHERE id=?""",
-                     (bio, location, vehicle, skills, avatar_path, cover_path, user[0]))
-        con.commit()
+        db_write("""UPDATE users SET bio=?, location=?, vehicle=?, skills=?,
+                     avatar=COALESCE(NULLIF(?, ''), avatar),
+                     cover=COALESCE(NULLIF(?, ''), cover)
+                  WHERE id=?""",
+                  (bio, location, vehicle, skills, avatar_path, cover_path, user[0]))
         return redirect(f"/profile/{user[0]}")
     return render_template_string(EDIT_PROFILE_TEMPLATE, user=user)
 
@@ -287,7 +373,7 @@ def profile_redirect():
 
 @app.route("/explore")
 def explore():
-    con = sqlite3.connect("wheelsup.db")
+    con = snapshot_db()
     cur = con.cursor()
     cur.execute("SELECT id, name FROM users ORDER BY id DESC LIMIT 10")
     users = cur.fetchall()
@@ -301,12 +387,8 @@ def explore():
 def follow(followee_id):
     user = get_user()
     if user:
-        con = sqlite3.connect("wheelsup.db")
-        try:
-            con.execute("INSERT INTO follows (follower_id, followee_id) VALUES (?, ?)", (user[0], followee_id))
-        except:
-            con.execute("DELETE FROM follows WHERE follower_id=? AND followee_id=?", (user[0], followee_id))
-        con.commit()
+        db_toggle("INSERT INTO follows (follower_id, followee_id) VALUES (?, ?)",
+                  "DELETE FROM follows WHERE follower_id=? AND followee_id=?", (user[0], followee_id))
     return redirect("/explore")
 
 # WheelSup - Ultra Build v3.0
@@ -322,12 +404,10 @@ def trip():
         description = request.form["description"]
         location = request.form["location"]
         date = request.form["date"]
-        con = sqlite3.connect("wheelsup.db")
-        con.execute("INSERT INTO trips (user_id, title, description, trip_date, location) VALUES (?, ?, ?, ?, ?)",
-                    (user[0], title, description, date, location))
-        con.commit()
+        db_write("INSERT INTO trips (user_id, title, description, trip_date, location) VALUES (?, ?, ?, ?, ?)",
+                 (user[0], title, description, date, location))
         return redirect("/trip")
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("""SELECT trips.id, users.name, title, description, trip_date, location
                    FROM trips JOIN users ON trips.user_id = users.id
@@ -348,22 +428,16 @@ def comment_trip(trip_id):
     user = get_user()
     if not user: return redirect("/login")
     content = request.form["comment"]
-    con = sqlite3.connect("wheelsup.db")
-    con.execute("INSERT INTO trip_comments (trip_id, user_id, content, created_at) VALUES (?, ?, ?, ?)",
-                (trip_id, user[0], content, str(datetime.datetime.now())))
-    con.commit()
+    db_write("INSERT INTO trip_comments (trip_id, user_id, content, created_at) VALUES (?, ?, ?, ?)",
+             (trip_id, user[0], content, str(datetime.datetime.now())))
     return redirect("/trip")
 
 @app.route("/trip/rsvp/<int:trip_id>")
 def rsvp_trip(trip_id):
     user = get_user()
     if not user: return redirect("/login")
-    con = sqlite3.connect("wheelsup.db")
-    try:
-        con.execute("INSERT INTO trip_rsvps (user_id, trip_id) VALUES (?, ?)", (user[0], trip_id))
-    except:
-        con.execute("DELETE FROM trip_rsvps WHERE user_id=? AND trip_id=?", (user[0], trip_id))
-    con.commit()
+    db_toggle("INSERT INTO trip_rsvps (user_id, trip_id) VALUES (?, ?)",
+              "DELETE FROM trip_rsvps WHERE user_id=? AND trip_id=?", (user[0], trip_id))
     return redirect("/trip")
 
 # WheelSup - Ultra Build v3.0
@@ -374,37 +448,39 @@ def dm(user_id):
     user = get_user()
     if not user:
         return redirect("/login")
-    con = sqlite3.connect("wheelsup.db")
-    cur = con.cursor()
     if request.method == "POST":
         msg = request.form["message"]
-        cur.execute("""INSERT INTO messages (sender_id, receiver_id, message, created_at)
-                       VALUES (?, ?, ?, ?)""",
-                    (user[0], user_id, msg, str(datetime.datetime.now())))
-        con.commit()
-    cur.execute("""SELECT sender_id, message, created_at
-                   FROM messages
-                   WHERE (sender_id=? AND receiver_id=?) OR (sender_id=? AND receiver_id=?)
-                   ORDER BY created_at""",
-                (user[0], user_id, user_id, user[0]))
-    messages = cur.fetchall()
-    return render_template_string(CHAT_TEMPLATE, messages=messages, me=user[0], you=user_id)
+        db_write("""INSERT INTO messages (sender_id, receiver_id, message, created_at)
+                    VALUES (?, ?, ?, ?)""",
+                 (user[0], user_id, msg, str(datetime.datetime.now())))
+    con = connect()
+    cur = con.cursor()
+    archived = cur.execute("""SELECT 1 FROM archived_messages
+                              WHERE (sender_id=? AND receiver_id=?) OR (sender_id=? AND receiver_id=?)""",
+                           (user[0], user_id, user_id, user[0])).fetchone()
+    messages, older = load_page("messages", """SELECT t.sender_id, t.message, t.created_at
+                                               FROM {src} AS t
+                                               WHERE ((t.sender_id=? AND t.receiver_id=?) OR (t.sender_id=? AND t.receiver_id=?))""",
+                                (user[0], user_id, user_id, user[0]), request.args.get("before"), archived)
+    return render_template_string(CHAT_TEMPLATE, messages=messages[::-1], me=user[0], you=user_id, older=older)
 
 @app.route("/inbox")
 def inbox():
     user = get_user()
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
     cur.execute("""SELECT DISTINCT receiver_id FROM messages WHERE sender_id=?
-                   UNION SELECT DISTINCT sender_id FROM messages WHERE receiver_id=?""",
-                (user[0], user[0]))
+                   UNION SELECT DISTINCT sender_id FROM messages WHERE receiver_id=?
+                   UNION SELECT receiver_id FROM archived_messages WHERE sender_id=?
+                   UNION SELECT sender_id FROM archived_messages WHERE receiver_id=?""",
+                (user[0], user[0], user[0], user[0]))
     users = cur.fetchall()
     return render_template_string(INBOX_TEMPLATE, users=users)
 
 @app.route("/notifications")
 def notifications():
     user = get_user()
-    con = sqlite3.connect("wheelsup.db")
+    con = connect()
     cur = con.cursor()
 
     cur.execute("""SELECT posts.id, users.name, 'liked your post', posts.created_at
@@ -414,12 +490,16 @@ def notifications():
                    WHERE posts.user_id=?""", (user[0],))
     likes = cur.fetchall()
 
-    cur.execute("""SELECT posts.id, users.name, 'commented on your post', comments.created_at
-                   FROM comments
-                   JOIN posts ON comments.post_id = posts.id
-                   JOIN users ON comments.user_id = users.id
-                   WHERE posts.user_id=?""", (user[0],))
-    comments = cur.fetchall()
+    cur.execute("""SELECT 1 FROM archived_comments
+                   WHERE post_id IN (SELECT id FROM posts WHERE user_id=?)""", (user[0],))
+    archived = cur.fetchone()
+    comments, older = load_page("comments", """SELECT posts.id, users.name, 'commented on your post', t.created_at
+                                               FROM {src} AS t
+                                               JOIN main.posts ON t.post_id = posts.id
+                                               JOIN main.users ON t.user_id = users.id
+                                               WHERE posts.user_id=?""", (user[0],), request.args.get("before"), archived)
+    if request.args.get("before"):
+        return render_template_string(NOTIFICATION_TEMPLATE, notes=comments, older=older)
 
     cur.execute("""SELECT NULL, users.name, 'followed you', NULL
                    FROM follows
@@ -428,12 +508,222 @@ def notifications():
     follows = cur.fetchall()
 
     all_notes = likes + comments + follows
-    return render_template_string(NOTIFICATION_TEMPLATE, notes=all_notes)
+    return render_template_string(NOTIFICATION_TEMPLATE, notes=all_notes, older=older)
 
 @app.route("/static/uploads/<path:filename>")
 def uploaded_file(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
+# WheelSup - Ultra Build v3.0
+# Part 6b: Retention - Monthly Archive Partitions, "Load Older" Reads, Incremental Vacuum
+#
+# Rows in ARCHIVE_TABLES older than ARCHIVE_AFTER_DAYS move to archive/wheelsup-YYYY-MM.db
+# (one file per month of created_at) so wheelsup.db stays small. Run it from cron with:
+#     flask --app app archive
+
+def archive_path(month):
+    return os.path.join(ARCHIVE_FOLDER, f"wheelsup-{month}.db")
+
+def archive_months():
+    if not os.path.isdir(ARCHIVE_FOLDER):
+        return []
+    names = [n for n in os.listdir(ARCHIVE_FOLDER) if n.startswith("wheelsup-") and n.endswith(".db")]
+    return sorted((n[len("wheelsup-"):-len(".db")] for n in names), reverse=True)
+
+def load_page(table, sql, params, before=None, archived=False, limit=PAGE_SIZE):
+    # `sql` reads from "{src} AS t" and selects t.created_at as its last column.
+    # Pages newest-first through the hot table; archive months are only attached, one
+    # at a time, once the user asks for an older page (`before` set). `archived` says
+    # whether the caller's hot tally has any archived rows for this query. Returns
+    # (rows, cursor for the next older page or None).
+    page_sql = sql + " AND t.created_at < ? ORDER BY t.created_at DESC LIMIT ?"
+    con = connect()
+    rows = con.execute(page_sql.format(src=f"main.{table}"), (*params, before or "9999", limit + 1)).fetchall()
+    if not before:
+        con.close()
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1][-1]
+        return rows, (rows[-1][-1] if rows else "9999") if archived else None
+    for month in archive_months():
+        if len(rows) > limit:
+            break
+        if month > before[:7]:
+            continue
+        con.execute("ATTACH DATABASE ? AS arc", (archive_path(month),))
+        try:
+            if con.execute("SELECT 1 FROM arc.sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+                rows += con.execute(page_sql.format(src=f"arc.{table}"),
+                                    (*params, before, limit + 1 - len(rows))).fetchall()
+        finally:
+            con.execute("DETACH DATABASE arc")
+    con.close()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1][-1]
+    return rows, None
+
+def archive_batch(con, table, cutoff):
+    index, tally, keys = ARCHIVE_TABLES[table]
+    ids_by_month = {}
+    for rowid, month in con.execute(f"""SELECT rowid, substr(created_at, 1, 7) FROM {table}
+                                        WHERE created_at < ? ORDER BY created_at LIMIT ?""",
+                                    (cutoff, ARCHIVE_BATCH_SIZE)):
+        ids_by_month.setdefault(month, []).append(rowid)
+    ddl = con.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()[0]
+    moved = 0
+    for month, ids in ids_by_month.items():
+        where = f"rowid IN ({','.join('?' * len(ids))}) AND created_at < ?"
+        con.execute("ATTACH DATABASE ? AS arc", (archive_path(month),))
+        try:
+            con.execute(ddl.replace("CREATE TABLE ", "CREATE TABLE IF NOT EXISTS arc.", 1))
+            con.execute(f"CREATE INDEX IF NOT EXISTS arc.idx_{table}_lookup ON {table}({index})")
+            # WAL makes a transaction across attached files atomic per file only, so the
+            # copy commits first and the hot delete second. Rows left in both by a crash
+            # in between are skipped here on the next run; any other key clash fails.
+            con.execute("BEGIN")
+            try:
+                con.execute(f"""INSERT INTO arc.{table} SELECT * FROM main.{table} WHERE {where}
+                                EXCEPT SELECT * FROM arc.{table} WHERE rowid IN ({','.join('?' * len(ids))})""",
+                            (*ids, cutoff, *ids))
+                con.execute("COMMIT")
+            except sqlite3.Error:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # Hot tallies keep inbox partners and badge counts right after the move.
+                con.execute(f"""INSERT INTO main.{tally} ({keys}, total)
+                                SELECT {keys}, COUNT(*) FROM main.{table} WHERE {where} GROUP BY {keys}
+                                ON CONFLICT({keys}) DO UPDATE SET total = total + excluded.total""",
+                            (*ids, cutoff))
+                moved += con.execute(f"DELETE FROM main.{table} WHERE {where}", (*ids, cutoff)).rowcount
+                con.execute("COMMIT")
+            except sqlite3.Error:
+                con.execute("ROLLBACK")
+                raise
+        finally:
+            con.execute("DETACH DATABASE arc")
+    return moved
+
+def archive_old_rows(days=ARCHIVE_AFTER_DAYS):
+    cutoff = str(datetime.datetime.now() - datetime.timedelta(days=days))
+    os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
+    con = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    moved = 0
+    try:
+        # Until `archive --convert` has run, freed pages stay in the file for reuse.
+        vacuum = con.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        for table in ARCHIVE_TABLES:
+            while True:
+                n = archive_batch(con, table, cutoff)
+                moved += n
+                if vacuum:
+                    con.execute(f"PRAGMA incremental_vacuum({ARCHIVE_VACUUM_PAGES})").fetchall()
+                if n < ARCHIVE_BATCH_SIZE:
+                    break
+                time.sleep(ARCHIVE_PAUSE)
+        while vacuum and con.execute("PRAGMA freelist_count").fetchone()[0]:
+            con.execute(f"PRAGMA incremental_vacuum({ARCHIVE_VACUUM_PAGES})").fetchall()
+            time.sleep(ARCHIVE_PAUSE)
+    finally:
+        con.close()
+    return moved
+
+def convert_auto_vacuum():
+    # Databases created before incremental auto-vacuum need one full VACUUM, which
+    # rewrites the whole file under an exclusive lock: run it in a maintenance window.
+    con = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        con.execute("VACUUM")
+        return True
+    finally:
+        con.close()
+
+@app.cli.command("archive")
+@click.option("--days", default=ARCHIVE_AFTER_DAYS, show_default=True, help="Archive rows older than this many days.")
+@click.option("--convert", is_flag=True, help="One-off: switch an existing database to incremental auto-vacuum "
+                                               "(full VACUUM, locks the database; use a maintenance window).")
+def archive_command(days, convert):
+    if convert:
+        converted = convert_auto_vacuum()
+        click.echo(f"{DB_PATH} {'converted to' if converted else 'already uses'} incremental auto-vacuum")
+        return
+    moved = archive_old_rows(days)
+    click.echo(f"Archived {moved} rows older than {days} days into {ARCHIVE_FOLDER}/")
+
+# WheelSup - Ultra Build v3.0
+# Part 6c: Online Backups, Read-Only Replica for Heavy Queries
+#
+# Copies use the SQLite online backup API a few pages at a time from a single read
+# snapshot, so live writers are never held up. Run both from cron:
+#     flask --app app backup
+#     flask --app app replica
+
+def copy_db(src_path, dst_path):
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    src = sqlite3.connect(src_path, timeout=30, isolation_level=None)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        # Copy from one read snapshot: on the WAL-mode live database other writers carry
+        # on and never restart the copy. Archive partitions only block the archiver.
+        src.execute("BEGIN")
+        src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        src.backup(dst, pages=BACKUP_STEP_PAGES, progress=lambda status, remaining, total: time.sleep(BACKUP_PAUSE))
+        src.execute("COMMIT")
+        dst.execute("PRAGMA journal_mode=DELETE")  # standalone file, no -wal/-shm needed
+        if dst.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+            raise sqlite3.DatabaseError(f"integrity check failed for copy of {src_path}")
+        dst.close()
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        dst.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        src.close()
+
+def backup_all():
+    # Each run lands in backups/<timestamp>/ holding wheelsup.db plus every archive
+    # partition; only the newest BACKUP_KEEP complete runs are kept.
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    folder = os.path.join(BACKUP_FOLDER, stamp)
+    os.makedirs(folder + ".partial")
+    try:
+        copy_db(DB_PATH, os.path.join(folder + ".partial", os.path.basename(DB_PATH)))
+        for month in archive_months():
+            copy_db(archive_path(month), os.path.join(folder + ".partial", os.path.basename(archive_path(month))))
+    except BaseException:
+        shutil.rmtree(folder + ".partial", ignore_errors=True)
+        raise
+    os.rename(folder + ".partial", folder)
+    done = sorted(n for n in os.listdir(BACKUP_FOLDER) if not n.endswith(".partial"))
+    for old in done[:max(len(done) - BACKUP_KEEP, 0)]:
+        shutil.rmtree(os.path.join(BACKUP_FOLDER, old))
+    return folder
+
+def snapshot_db():
+    # Read-only connection for expensive reads that can tolerate REPLICA_MAX_AGE of
+    # staleness. Workers never refresh the replica themselves (that is the `replica`
+    # cron job); if it is missing or stale, reads fall back to the live file read-only.
+    try:
+        fresh = time.time() - os.path.getmtime(REPLICA_PATH) <= REPLICA_MAX_AGE
+    except OSError:
+        fresh = False
+    path = REPLICA_PATH if fresh else DB_PATH
+    return connect(f"file:{path}?mode=ro", uri=True)
+
+@app.cli.command("backup")
+def backup_command():
+    click.echo(f"Backup written to {backup_all()}/")
+
+@app.cli.command("replica")
+def replica_command():
+    copy_db(DB_PATH, REPLICA_PATH)
+    click.echo(f"Replica refreshed at {REPLICA_PATH}")
+
 # WheelSup - Ultra Build v3.0
 # Part 7: App Runner + Template Headers + Startup
 
@@ -535,6 +825,8 @@ FEED_TEMPLATE = TAILWIND_HEAD + HEADER_HTML + '''
       <button class="bg-blue-600 text-white px-2 rounded">Post</button>
     </form>
     <div class="mt-2 text-sm text-gray-700">
+      {% if older %}<a href="/post/{{ post[0] }}?before={{ older|urlencode }}" class="text-xs text-blue-600">Load older comments</a>
+      {% elif archived and archived.get(post[0]) %}<a href="/post/{{ post[0] }}?before={{ (comments[post[0]][0][2] if comments.get(post[0]) else '9999')|urlencode }}" class="text-xs text-blue-600">Load {{ archived[post[0]] }} older comments</a>{% endif %}
       {% for c in comments.get(post[0], []) %}
       <p><strong>{{ c[0] }}</strong>: {{ c[1] }} <i class="text-xs text-gray-400">{{ c[2] }}</i></p>
       {% endfor %}
@@ -619,6 +911,7 @@ EXPLORE_TEMPLATE = TAILWIND_HEAD + HEADER_HTML + '''
 CHAT_TEMPLATE = TAILWIND_HEAD + HEADER_HTML + '''
 <html><body class="bg-gray-100 p-6 max-w-xl mx-auto">
 <h2 class="text-2xl font-bold mb-4">Chat</h2>
+{% if older %}<a href="/dm/{{ you }}?before={{ older|urlencode }}" class="block text-center text-sm text-blue-600 mb-2">Load older messages</a>{% endif %}
 <div class="space-y-2">
 {% for m in messages %}
   <div class="{{ 'text-right' if m[0] == me else 'text-left' }}">
@@ -655,6 +948,7 @@ NOTIFICATION_TEMPLATE = TAILWIND_HEAD + HEADER_HTML + '''
   </a>
 {% endfor %}
 </div>
+{% if older %}<a href="/notifications?before={{ older|urlencode }}" class="block text-center text-sm text-blue-600 mt-4">Load older comments</a>{% endif %}
 </body></html>
 '''
 
@@ -0,0 +1,149 @@
+# WheelSup - Ultra Build v3.0
+# Concurrency benchmark: throughput and worker memory with thousands of idle/slow clients.
+#
+#     python bench_concurrency.py                      # gevent, gthread and sync
+#     python bench_concurrency.py --worker gevent --idle 5000
+#
+# For each worker class it starts one gunicorn worker (gunicorn.conf.py) in a scratch
+# directory and measures two workloads: "read" (GET /explore) and "mixed" (logged-in
+# clients cycling /like/1, POST /comment/1 and /explore, so writers contend for the
+# database lock). It then opens --idle connections that trickle request headers one
+# line at a time like a slow mobile client, and measures both again. Errors are 5xx
+# responses plus timeouts/connection failures.
+
+import argparse, http.client, os, resource, shutil, socket, subprocess, sys, tempfile, threading, time, urllib.parse
+
+WORKLOADS = {
+    "read": [("GET", "/explore", None)],
+    "mixed": [("GET", "/like/1", None),
+              ("POST", "/comment/1", urllib.parse.urlencode({"comment": "bench"})),
+              ("GET", "/explore", None)],
+}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def worker_rss_kb(master_pid):
+    total = 0
+    for pid in os.listdir("/proc"):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except (OSError, ValueError):
+            continue
+        if fields.get("PPid", "").strip() == str(master_pid):
+            total += int(fields.get("VmRSS", "0 kB").split()[0])
+    return total
+
+def login(port, i):
+    con = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    form = {"content-type": "application/x-www-form-urlencoded"}
+    account = {"email": f"bench{i}@example.com", "password": "bench", "name": f"Bench {i}"}
+    con.request("POST", "/register", urllib.parse.urlencode(account), form)
+    con.getresponse().read()
+    con.request("POST", "/login", urllib.parse.urlencode(account), form)
+    resp = con.getresponse()
+    resp.read()
+    con.close()
+    return resp.getheader("Set-Cookie").split(";")[0]
+
+def throughput(port, cookies, seconds, workload):
+    done, errors, deadline = [0] * len(cookies), [0] * len(cookies), time.time() + seconds
+    def run(i):
+        con = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        headers = {"Cookie": cookies[i], "content-type": "application/x-www-form-urlencoded"}
+        n = 0
+        while time.time() < deadline:
+            method, path, body = WORKLOADS[workload][n % len(WORKLOADS[workload])]
+            n += 1
+            try:
+                con.request(method, path, body, headers)
+                resp = con.getresponse()
+                resp.read()
+                if resp.status >= 500:
+                    errors[i] += 1
+                else:
+                    done[i] += 1
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                con.close()
+                con = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(cookies))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return sum(done) / seconds, sum(errors)
+
+def open_idle(port, count):
+    socks = []
+    for _ in range(count):
+        s = socket.socket()
+        s.settimeout(2)
+        try:
+            s.connect(("127.0.0.1", port))
+            s.sendall(b"GET /explore HTTP/1.1\r\nHost: bench\r\n")
+        except OSError:
+            s.close()
+            break
+        socks.append(s)
+    return socks
+
+def trickle(socks, stop):
+    while not stop.wait(5):
+        for s in socks:
+            try: s.sendall(b"X-Slow: 1\r\n")
+            except OSError: pass
+
+def wait_ready(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start")
+
+def bench(worker, args):
+    workdir = tempfile.mkdtemp(prefix="wheelsup-bench-")
+    env = dict(os.environ, WHEELSUP_WORKER=worker, WEB_CONCURRENCY="1", PORT=str(args.port))
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", os.path.join(HERE, "gunicorn.conf.py"),
+                               "--pythonpath", HERE, "--log-level", "error", "app:app"],
+                              cwd=workdir, env=env)
+    try:
+        wait_ready(args.port)
+        cookies = [login(args.port, i) for i in range(args.clients)]
+        throughput(args.port, cookies, 1, "mixed")  # warm up
+        base = {w: throughput(args.port, cookies, args.seconds, w) for w in WORKLOADS}
+        base_rss = worker_rss_kb(server.pid)
+        socks, stop = open_idle(args.port, args.idle), threading.Event()
+        threading.Thread(target=trickle, args=(socks, stop), daemon=True).start()
+        time.sleep(1)
+        load = {w: throughput(args.port, cookies, args.seconds, w) for w in WORKLOADS}
+        load_rss = worker_rss_kb(server.pid)
+        stop.set()
+        for s in socks: s.close()
+        return base, base_rss, len(socks), load, load_rss
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="WheelSup concurrency benchmark")
+    parser.add_argument("--worker", action="append", choices=["gevent", "gthread", "sync"])
+    parser.add_argument("--idle", type=int, default=2000, help="idle/slow connections to hold open")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients measuring throughput")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, min(hard, args.idle * 2 + 256)), hard))
+    print(f"{'worker':8} {'workload':8} {'req/s':>7} {'errors':>6} {'RSS MB':>7} | "
+          f"{'idle':>5} {'req/s':>7} {'errors':>6} {'RSS MB':>7}")
+    for worker in args.worker or ["gevent", "gthread", "sync"]:
+        base, base_rss, idle, load, load_rss = bench(worker, args)
+        for w in WORKLOADS:
+            print(f"{worker:8} {w:8} {base[w][0]:7.0f} {base[w][1]:6} {base_rss / 1024:7.1f} | "
+                  f"{idle:5} {load[w][0]:7.0f} {load[w][1]:6} {load_rss / 1024:7.1f}")
+
+if __name__ == "__main__":
+    main()
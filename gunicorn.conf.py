@@ -0,0 +1,24 @@
+# WheelSup - Ultra Build v3.0
+# Gunicorn settings, picked up automatically by `gunicorn app:app`.
+#
+# WHEELSUP_WORKER=gevent (default) is the evented mode: each worker holds thousands of
+# idle or slow connections (mobile uploads, long polls) as cheap greenlets, and app.py
+# runs database calls on a dedicated pool of WHEELSUP_DB_THREADS threads per worker.
+# WHEELSUP_WORKER=gthread keeps a fixed number of OS threads per worker; sync is the
+# old one-request-per-process behaviour. Worker count comes from WEB_CONCURRENCY.
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = os.environ.get("WHEELSUP_WORKER", "gevent")
+worker_connections = int(os.environ.get("WHEELSUP_WORKER_CONNECTIONS", "4096"))  # gevent
+threads = int(os.environ.get("WHEELSUP_THREADS", "8")) if worker_class == "gthread" else 1
+backlog = 4096
+timeout = 60
+keepalive = 5
+
+def post_worker_init(worker):
+    if worker.cfg.worker_class_str.startswith("gevent"):
+        from gevent.threadpool import ThreadPool
+        import app
+        app.db_pool = ThreadPool(app.DB_THREADS)